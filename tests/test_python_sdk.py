@@ -2,6 +2,10 @@
 """
 Test script for Heimdall Python SDK integration with backend and frontend.
 
+Exercises the MCP decorators (`trace_mcp_tool`, and where the installed SDK
+provides them, `trace_mcp_resource`, `trace_mcp_prompt` and `observe`) from a
+single parametrized operations table, sharing one client and one flush.
+
 Usage:
     cd heimdall/tests
     python3 -m venv .venv
@@ -10,53 +14,119 @@ Usage:
     python test_python_sdk.py [project_id]
 """
 
+import ast
+import operator
 import os
+import reprlib
 import sys
 import time
-import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from random import Random
+
+# Dedicated RNG instance: the module-level random functions all share one
+# locked Random, which contends once the operations run concurrently.
+_rng = Random()
+
+# Bounded repr for log lines: stops walking a result once its limits are
+# hit instead of stringifying the whole structure just to truncate it.
+_result_repr = reprlib.Repr()
+_result_repr.maxstring = 60
+_result_repr.maxlist = 2
+_result_repr.maxdict = 3
 
 # Get project ID from command line or use default
 PROJECT_ID = sys.argv[1] if len(sys.argv) > 1 else "test-python-sdk"
 
-# Set environment variables for local development
-os.environ["HEIMDALL_ENDPOINT"] = "http://localhost:4318"
-os.environ["HEIMDALL_ENABLED"] = "true"
-os.environ["HEIMDALL_PROJECT_ID"] = PROJECT_ID
-os.environ["HEIMDALL_SERVICE_NAME"] = "python-sdk-test"
-os.environ["HEIMDALL_ENVIRONMENT"] = "test"
+# Default environment variables for local development. setdefault lets
+# pre-set shell values win and skips the putenv sync for keys already
+# exported.
+for _key, _value in {
+    "HEIMDALL_ENDPOINT": "http://localhost:4318",
+    "HEIMDALL_ENABLED": "true",
+    "HEIMDALL_PROJECT_ID": PROJECT_ID,
+    "HEIMDALL_SERVICE_NAME": "python-sdk-test",
+    "HEIMDALL_ENVIRONMENT": "test",
+}.items():
+    os.environ.setdefault(_key, _value)
 
 # Import the SDK
+import hmdl
 from hmdl import HeimdallClient, trace_mcp_tool
 
-# Initialize the client
-client = HeimdallClient()
+# Decorators added in newer SDK releases; resolve lazily so older SDKs
+# still run the tool-only portion of the test.
+trace_mcp_resource = getattr(hmdl, "trace_mcp_resource", None)
+trace_mcp_prompt = getattr(hmdl, "trace_mcp_prompt", None)
+observe = getattr(hmdl, "observe", None)
+
+
+@lru_cache(maxsize=1)
+def _get_client() -> HeimdallClient:
+    """Build the shared client on first use.
 
-print("=" * 60)
-print("Heimdall Python SDK Integration Test")
-print("=" * 60)
-print(f"Endpoint: {client.config.endpoint}")
-print(f"Project ID: {client.config.project_id}")
-print(f"Service: {client.config.service_name}")
-print()
+    Client construction sets up the OTLP exporter pipeline (and possibly a
+    DNS lookup), so it is deferred out of import time and cached: importing
+    this module under pytest collection or re-running main() in a loop
+    reuses one exporter/channel instead of rebuilding it.
+    """
+    return HeimdallClient()
 
 
 @trace_mcp_tool(name="search-tool")
 def search_tool(query: str, limit: int = 10) -> dict:
     """Search tool for finding documents."""
-    time.sleep(random.uniform(0.05, 0.15))
+    time.sleep(_rng.uniform(0.05, 0.15))
+    # Bind the title template and RNG once outside the comprehension; the
+    # per-row f-string and attribute lookups add up for larger limits.
+    title = "Result {} for '{}'".format
+    rand = _rng.random
     results = [
-        {"id": i, "title": f"Result {i} for '{query}'", "score": random.uniform(0.7, 1.0)}
+        {"id": i, "title": title(i, query), "score": 0.7 + rand() * 0.3}
         for i in range(min(limit, 5))
     ]
     return {"query": query, "total_results": len(results), "results": results}
 
 
+# Arithmetic operators allowed in calculator expressions.
+_BIN_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+_UNARY_OPS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+
+def _eval_node(node):
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+        return _BIN_OPS[type(node.op)](_eval_node(node.left), _eval_node(node.right))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        return _UNARY_OPS[type(node.op)](_eval_node(node.operand))
+    raise ValueError(f"unsupported expression node: {type(node).__name__}")
+
+
+@lru_cache(maxsize=128)
+def _safe_eval(expression: str):
+    """Evaluate an arithmetic-only expression without eval().
+
+    Walks the parsed AST instead of running the full compile pipeline, and
+    memoizes per expression so repeated inputs skip parsing entirely.
+    """
+    return _eval_node(ast.parse(expression, mode="eval").body)
+
+
 @trace_mcp_tool(name="calculator")
 def calculator(expression: str) -> dict:
     """Calculator tool for evaluating expressions."""
-    time.sleep(random.uniform(0.03, 0.1))
+    time.sleep(_rng.uniform(0.03, 0.1))
     try:
-        result = eval(expression)
+        result = _safe_eval(expression)
         return {"expression": expression, "result": result, "status": "success"}
     except Exception as e:
         return {"expression": expression, "error": str(e), "status": "error"}
@@ -65,19 +135,19 @@ def calculator(expression: str) -> dict:
 @trace_mcp_tool(name="weather-tool")
 def get_weather(city: str) -> dict:
     """Weather tool for getting weather information."""
-    time.sleep(random.uniform(0.05, 0.1))
+    time.sleep(_rng.uniform(0.05, 0.1))
     return {
         "city": city,
-        "temperature": random.randint(15, 30),
-        "condition": random.choice(["sunny", "cloudy", "rainy"]),
-        "humidity": random.randint(40, 80)
+        "temperature": _rng.randint(15, 30),
+        "condition": _rng.choice(["sunny", "cloudy", "rainy"]),
+        "humidity": _rng.randint(40, 80)
     }
 
 
 @trace_mcp_tool(name="translate-tool")
 def translate(text: str, target_lang: str) -> dict:
     """Translation tool for translating text."""
-    time.sleep(random.uniform(0.05, 0.1))
+    time.sleep(_rng.uniform(0.05, 0.1))
     return {
         "original": text,
         "translated": f"[{target_lang}] {text}",
@@ -88,7 +158,7 @@ def translate(text: str, target_lang: str) -> dict:
 @trace_mcp_tool(name="summarize-tool")
 def summarize(content: str, max_length: int = 100) -> dict:
     """Summarization tool for summarizing content."""
-    time.sleep(random.uniform(0.05, 0.1))
+    time.sleep(_rng.uniform(0.05, 0.1))
     summary = content[:max_length] + "..." if len(content) > max_length else content
     return {
         "original_length": len(content),
@@ -97,8 +167,46 @@ def summarize(content: str, max_length: int = 100) -> dict:
     }
 
 
-def main():
-    """Run test operations to generate traces."""
+def read_app_config(uri: str) -> dict:
+    """Resource handler returning application configuration."""
+    time.sleep(_rng.uniform(0.03, 0.08))
+    return {
+        "uri": uri,
+        "mime_type": "application/json",
+        "contents": {"theme": "dark", "language": "en"}
+    }
+
+
+def code_review_prompt(language: str) -> dict:
+    """Prompt handler producing a code review prompt."""
+    time.sleep(_rng.uniform(0.03, 0.08))
+    return {
+        "language": language,
+        "messages": [{"role": "user", "content": f"Review this {language} code."}]
+    }
+
+
+def process_items(items: list) -> dict:
+    """Plain function traced with the general-purpose observe decorator."""
+    time.sleep(_rng.uniform(0.03, 0.08))
+    return {"processed": len(items), "items": items}
+
+
+# Decorators that may be missing on older SDKs, as
+# (decorator_factory, span_name, fn, invoke) rows. Rows whose factory
+# resolved to None are skipped when the operations list is built.
+OPTIONAL_OPERATIONS = (
+    (trace_mcp_resource, "config-resource", read_app_config,
+     lambda fn: fn("config://app/settings")),
+    (trace_mcp_prompt, "code-review-prompt", code_review_prompt,
+     lambda fn: fn("python")),
+    (observe, "process-items", process_items,
+     lambda fn: fn(["alpha", "beta", "gamma"])),
+)
+
+
+def build_operations() -> list:
+    """Build the (name, callable) operations list for this SDK version."""
     operations = [
         ("Search Tool", lambda: search_tool("test query", limit=3)),
         ("Calculator", lambda: calculator("10 * 5 + 2")),
@@ -106,22 +214,62 @@ def main():
         ("Translate Tool", lambda: translate("Hello world", "es")),
         ("Summarize Tool", lambda: summarize("This is a long text that needs to be summarized.", 20)),
     ]
+    for factory, span_name, fn, invoke in OPTIONAL_OPERATIONS:
+        if factory is None:
+            continue
+        traced = factory(name=span_name)(fn)
+        operations.append((span_name, lambda traced=traced, invoke=invoke: invoke(traced)))
+    return operations
+
+
+def main():
+    """Run test operations to generate traces."""
+    client = _get_client()
+
+    print("=" * 60)
+    print("Heimdall Python SDK Integration Test")
+    print("=" * 60)
+    print(f"Endpoint: {client.config.endpoint}")
+    print(f"Project ID: {client.config.project_id}")
+    print(f"Service: {client.config.service_name}")
+    print()
+
+    operations = build_operations()
+
+    # The operations are I/O-bound (sleeps plus queued OTLP export), so run
+    # them on a thread pool; the BatchSpanProcessor is thread-safe. Results
+    # are collected per operation and printed in table order afterwards so
+    # the log stays deterministic.
+    outcomes = {}
+    with ThreadPoolExecutor(max_workers=len(operations)) as executor:
+        futures = {executor.submit(operation): name for name, operation in operations}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                outcomes[name] = (True, future.result())
+            except Exception as e:
+                outcomes[name] = (False, e)
 
     success_count = 0
-    for name, operation in operations:
+    for name, _ in operations:
+        ok, value = outcomes[name]
         print(f"Running: {name}...")
-        try:
-            result = operation()
-            print(f"  ✓ Success: {str(result)[:60]}...")
+        if ok:
+            print(f"  ✓ Success: {_result_repr.repr(value)}")
             success_count += 1
-        except Exception as e:
-            print(f"  ✗ Error: {e}")
+        else:
+            print(f"  ✗ Error: {value}")
         print()
 
-    # Flush traces
+    # Flush traces. flush() blocks until the BatchSpanProcessor drains (or
+    # its timeout elapses), so no extra sleep is needed; shut the client
+    # down as well in case flush() is fire-and-forget on the installed SDK,
+    # since SpanProcessor.shutdown() is defined to drain the queue.
     print("Flushing traces...")
     client.flush()
-    time.sleep(1)
+    shutdown = getattr(client, "shutdown", None)
+    if shutdown is not None:
+        shutdown()
 
     print()
     print("=" * 60)
@@ -138,4 +286,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-